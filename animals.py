@@ -1,4 +1,5 @@
 import pandas as pd
+from profiler import profiled
 
 WEBSITE = "https://www.iucnredlist.org"
 
@@ -38,6 +39,7 @@ class Animal:
     species = pd.DataFrame({})
     names = pd.DataFrame({})
     assessments = pd.DataFrame({})
+    @profiled('Animal()')
     def __init__(self, name: str):
         self.name = self.get_scientific(name)
         self.info = Animal.species.query(f"scientificName == \'{self.name}\'")
@@ -0,0 +1,201 @@
+'''
+FILE NAME:  benchmark.py
+DESCRIPTION:    times and memory-profiles the hot paths of the software
+                on synthetic datasets (see synthetic.py) and saves
+                the results into a json file, so that runs can be compared
+USAGE:      python benchmark.py --sizes 10000 100000 --output bench.json
+            python benchmark.py --compare old.json new.json
+'''
+
+import matplotlib
+matplotlib.use('Agg') # headless backend: charts are rendered but never shown
+
+import argparse, json, os, platform, sys, tempfile, tracemalloc, webbrowser
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from animals import Animal
+from trees import TaxonTree, build_tree
+
+import charts, explore, synthetic
+
+
+def measure(func, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Calls func repeat times and one more time under tracemalloc
+
+    Returns
+    -------
+    dict
+        Minimum, mean and maximum wall times in seconds and
+        the peak of memory allocated by Python in bytes (None if not measured)
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    peak = None
+    if memory: # separate run, tracemalloc slows everything down
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'min': min(times), 'mean': sum(times)/len(times), 'max': max(times),
+            'repeat': repeat, 'peak_memory': peak}
+
+
+@contextmanager
+def no_browser():
+    """
+    Temporarily replaces webbrowser.open, so that pages are written but never opened
+    """
+    original = webbrowser.open
+    webbrowser.open = lambda *args, **kwargs: True
+    try:
+        yield
+    finally:
+        webbrowser.open = original
+
+
+def bench_size(n_species: int, folder: str, repeat: int = 3, memory: bool = True,
+               lookups: int = 100, seed: int = 0, text_length: int = 400) -> list[dict]:
+    """
+    Generates a synthetic dataset of n_species into folder
+    and measures each hot path on it
+
+    Returns
+    -------
+    list[dict]
+        One record per benchmark
+    """
+    paths = synthetic.generate(n_species, folder, seed, text_length)
+    results = []
+
+    def record(name: str, func, times: int = repeat):
+        print(f"  {name:<28}", end = '', flush = True)
+        result = {'size': n_species, 'benchmark': name, **measure(func, times, memory)}
+        print(f"{result['mean']:10.4f}s", end = '')
+        print('' if result['peak_memory'] is None else f"{result['peak_memory']/2**20:10.1f} MiB")
+        results.append(result)
+
+    ### CSV load, as done in launcher.py
+    record('load simple_summary.csv', lambda: pd.read_csv(paths['simple_summary.csv']))
+    record('load common_names.csv', lambda: pd.read_csv(paths['common_names.csv']))
+    record('load assessments.csv',
+           lambda: pd.read_csv(paths['assessments.csv'], index_col = 'assessmentId'))
+    Animal.species = pd.read_csv(paths['simple_summary.csv'])
+    Animal.names = pd.read_csv(paths['common_names.csv'])
+    Animal.assessments = pd.read_csv(paths['assessments.csv'], index_col = 'assessmentId')
+
+    ### Animal construction, both from common and scientific names
+    rng = np.random.default_rng(seed)
+    sample = list(Animal.species['scientificName'].sample(lookups, random_state = seed))
+    sample[::2] = list(Animal.names.query('main')['name'].sample(len(sample[::2]), random_state = seed))
+    record(f'Animal() x{lookups}', lambda: [Animal(name) for name in sample])
+
+    ### taxonomic tree
+    def build() -> TaxonTree:
+        tree = TaxonTree('Animal')
+        tree.add_animals(Animal.species)
+        return tree
+    record('TaxonTree.add_animals', build)
+    record('build_tree (process pool)', lambda: build_tree(Animal.species))
+    tree = build()
+    record('str(tree)', lambda: str(tree))
+
+    ### charts
+    biggest = Animal.species['className'].value_counts().index[0]
+    for name, chart in [('charts.plot_total', charts.plot_total),
+                        ('charts.classes_distribution', charts.classes_distribution),
+                        ('charts.plot_all_classes', charts.plot_all_classes),
+                        ('charts.plot_class', lambda species: charts.plot_class(species, biggest))]:
+        def render(chart = chart):
+            chart(Animal.species)
+            plt.gcf().canvas.draw() # forces the actual rendering
+            plt.close('all')
+        record(name, render)
+
+    ### offline pages, written in a temporary folder
+    animals = [Animal(name) for name in rng.choice(Animal.species['scientificName'], 10)]
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        with no_browser():
+            record('explore.watch_offline x10', lambda: [explore.watch_offline(a) for a in animals])
+    finally:
+        os.chdir(cwd)
+
+    return results
+
+
+def compare(old: dict, new: dict) -> None:
+    """
+    Prints the mean time ratio new/old of each benchmark run in both files
+    """
+    before = {(r['size'], r['benchmark']): r for r in old['results']}
+    print(f"{'size':>8}  {'benchmark':<28}{'old':>10}{'new':>10}{'ratio':>8}")
+    for result in new['results']:
+        key = (result['size'], result['benchmark'])
+        if key in before:
+            previous = before[key]['mean']
+            print(f"{key[0]:>8}  {key[1]:<28}{previous:10.4f}{result['mean']:10.4f}"
+                  f"{result['mean']/previous if previous else float('nan'):8.2f}")
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description = 'IUCN Red List benchmark suite')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [10_000],
+                        help = 'numbers of synthetic species, from 10k to 1M')
+    parser.add_argument('--repeat', type = int, default = 3)
+    parser.add_argument('--lookups', type = int, default = 100, help = 'Animal objects to construct')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--text-length', type = int, default = 400,
+                        help = 'characters of each text field in assessments.csv')
+    parser.add_argument('--no-memory', action = 'store_true', help = 'skip the tracemalloc runs')
+    parser.add_argument('--data-dir', help = 'keep the generated datasets in this folder')
+    parser.add_argument('--output', default = 'bench.json')
+    parser.add_argument('--compare', nargs = 2, metavar = ('OLD', 'NEW'),
+                        help = 'compare two result files instead of running')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec = 'seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'text_length': args.text_length
+        },
+        'results': []
+    }
+    for size in args.sizes:
+        print(f"{size} species")
+        if args.data_dir:
+            folder = os.path.abspath(os.path.join(args.data_dir, str(size)))
+            report['results'] += bench_size(size, folder, args.repeat, not args.no_memory,
+                                            args.lookups, args.seed, args.text_length)
+        else:
+            with tempfile.TemporaryDirectory() as folder:
+                report['results'] += bench_size(size, folder, args.repeat, not args.no_memory,
+                                                args.lookups, args.seed, args.text_length)
+
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent = 2)
+    print(f"Results saved as '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
 import pandas as pd
 from matplotlib import pyplot as plt
 from itertools import product # cartesian product
+from profiler import profiled
 
 
+@profiled('charts.plot_total')
 def plot_total(species: pd.DataFrame, style = 'bmh') -> None:
     """
     Draws a summary chart of the Red List Categories
@@ -19,6 +21,7 @@ def plot_total(species: pd.DataFrame, style = 'bmh') -> None:
                            ylabel='', wedgeprops=dict(width=0.6))
 
 
+@profiled('charts.plot_all_classes')
 def plot_all_classes(species: pd.DataFrame, style = 'bmh'):
     """
     Draws Red List Categories chart for each class
@@ -48,6 +51,7 @@ def plot_all_classes(species: pd.DataFrame, style = 'bmh'):
                             labeldistance = 1.15, wedgeprops = dict(width=0.6))
 
 
+@profiled('charts.plot_class')
 def plot_class(species: pd.DataFrame, classname: str, style = 'bmh'):
     """
     Draws Red List Categories chart for a given class
@@ -63,6 +67,7 @@ def plot_class(species: pd.DataFrame, classname: str, style = 'bmh'):
                            ylabel='', wedgeprops=dict(width=0.6))
  
 
+@profiled('charts.classes_distribution')
 def classes_distribution(species: pd.DataFrame, style = 'bmh'):
     """
     Draws distribution of classes on a bar chart
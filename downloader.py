@@ -8,71 +8,87 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
 from animals import Animal
+from profiler import profiled
+from jobs import checkpoint, Cancelled
 
-def download(animal: Animal) -> int:
-    """
-    This function attempts to reach a photo of the animal 
-    online and to pull it down on a jpg local file
+CHUNK_SIZE = 64*1024
+TIMEOUT = 30 # seconds without receiving any byte before giving up
 
-    Returns
-    -------
-     0 - successful download and image display
-     1 - successful display
-    -1 - an error occured
-    """
+def image_path(animal: Animal) -> str:
     image = f"{animal.name.replace(' ', '-').lower()}.jpg" 
     # Carcharodon carcharias -> "carcharodon-carcharias.jpg"
-    image_path = os.path.join("images", image)
     # On Windows -> "...\\images\carcharodon-carcharias.jpg"
     # On MacOS or Linux -> ".../images/carcharodon-carcharias.jpg"
+    return os.path.join("images", image)
 
-    choice = 'y' # initial value set to 'y' to avoid to enter the second conditional block
 
-    if os.path.exists(image_path): # checks if wanted image is already saved locally
-        choice = input("Image already existing. Download again (Y/N)? ")
-    
-    if choice.lower() not in ['y', 'yes']: #every not y/yes choice will be considered a no
-        plt.figure(image_path) # opens a matplotlib window with a costumized heading name
-        # display a local image
-        img = mpimg.imread(image_path)
-        plt.imshow(img)
-        plt.axis('off')
-        return 1 # succesful opening
+def show(path: str) -> None:
+    """
+    Opens a matplotlib window displaying a local image.
+    It must be called by the main thread
+    """
+    plt.figure(os.path.basename(path)) # opens a matplotlib window with a costumized heading name
+    img = mpimg.imread(path)
+    plt.imshow(img)
+    plt.axis('off')
 
+
+@profiled('downloader.fetch')
+def fetch(animal: Animal, verbose: bool = True) -> int:
+    """
+    This function attempts to reach a photo of the animal 
+    online and to pull it down on a jpg local file, 
+    without displaying it, so it can run as a background job
+    (see jobs.py): it reports the progress and can be cancelled
+
+    Returns
+    -------
+     0 - successful download
+    -1 - an error occured
+    """
+    image = os.path.basename(image_path(animal))
     try:
         # try to download bytes from a url
-        request = requests.urlopen(f"https://wir.iucnredlist.org/{image}")
-        if not os.path.exists("images"):
-            os.makedirs("images") # makes a folder named "images" when not already existent
+        request = requests.urlopen(f"https://wir.iucnredlist.org/{image}", timeout = TIMEOUT)
+        size = int(request.headers.get('Content-Length') or 0)
+        chunks = []
+        downloaded = 0
+        while chunk := request.read(CHUNK_SIZE): # reading by chunks allows to cancel the job
+            chunks.append(chunk)
+            downloaded += len(chunk)
+            checkpoint(downloaded/size if size else None, f"{downloaded//1024} kB")
+        os.makedirs("images", exist_ok = True) # makes a folder named "images" when not already existent
         
         try: # try to write bytes on a binary file
-            with open(image_path, 'wb') as output:
-                output.write(request.read())
-            print(f"Image successfully downloaded as \'{image}\'")
-            # display image as soon as correctly downloaded
-            plt.figure(image)
-            img = mpimg.imread(image_path)
-            plt.imshow(img)
-            plt.axis('off')
-            return 0 #successful download and display
+            with open(image_path(animal), 'wb') as output:
+                output.write(b''.join(chunks))
+            if verbose:
+                print(f"Image successfully downloaded as \'{image}\'")
+            return 0 #successful download
         
         ### handle errors mostly due to incorrect paths
         except FileNotFoundError:
-            print("Error in saving the image after download")
-            print("FIleNotFoundError")
+            if verbose:
+                print("Error in saving the image after download")
+                print("FIleNotFoundError")
 
     ### exceptions handling
     except exceptions.HTTPError:
         # can be raised by a inexistent url
-        print("Image not found")
-        print("HTTP Error 403: Forbidden")
+        if verbose:
+            print("Image not found")
+            print("HTTP Error 403: Forbidden")
     except exceptions.URLError: 
         # can be raised by a SSL bad request, by an incorrect 
         # domain name or by a poor Internet connection
-        print("Attempt to reach the image at an invalid or unsecure URL")
-        print("Check your Internet connection before continuing")
+        if verbose:
+            print("Attempt to reach the image at an invalid or unsecure URL")
+            print("Check your Internet connection before continuing")
+    except Cancelled: # the background job has been cancelled, nothing was written
+        raise
     except: # generic error
-        print("Something went wrong. Check your internet connection")
+        if verbose:
+            print("Something went wrong. Check your internet connection")
     
     return -1 # failed
 
@@ -80,4 +96,7 @@ def download(animal: Animal) -> int:
 if __name__ == '__main__': 
     Animal.species = pd.read_csv("simple_summary.csv")
     Animal.names = pd.read_csv("common_names.csv")
-    download(Animal('White shark'))
+    animal = Animal('White shark')
+    if fetch(animal) == 0:
+        show(image_path(animal))
+        plt.show()
@@ -1,5 +1,6 @@
 import pandas as pd
 from animals import Animal, WEBSITE
+from profiler import profiled
 import os, webbrowser
 
 def watch_online(animal: Animal) -> None:
@@ -12,6 +13,7 @@ def watch_online(animal: Animal) -> None:
         print(f"No page found on {WEBSITE}")
 
 
+@profiled('explore.watch_offline')
 def watch_offline(animal: Animal) -> None:
     """
     Makes, saves and opens in a browser app a html page
@@ -65,8 +67,8 @@ def watch_offline(animal: Animal) -> None:
     f"</main>"
     )
 
-    if not os.path.exists("pages"):
-        os.makedirs("pages") # makes a folder named "pages" when not already existent
+    os.makedirs("pages", exist_ok = True) # makes a folder named "pages" when not already existent
+    # (exist_ok since background jobs may create it at the same time)
 
     with open(page, 'w', encoding = "utf-8") as output:
         # utf-8 encoding allows to encode special characters such as '≈'      
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+
+# Compound filters over the species, e.g.
+#     index = SpeciesIndex(Animal.species, Animal.assessments)
+#     selection = ((index.className == 'AVES') & (index.redlistCategory == 'Endangered')
+#                  & (index.populationTrend == 'Decreasing') & index.systems.contains('Marine'))
+#     charts.plot_total(index.select(selection))
+# Every categorical value has a bitmap (a NumPy bool array with one item per species),
+# hence a compound filter costs a few vectorized bitwise operations.
+
+CATEGORICAL = ('className', 'orderName', 'familyName', 'redlistCategory', 'populationTrend')
+MULTIVALUED = ('realm', 'systems') # columns of assessments.csv, values separated by '|'
+NUMERIC = ('yearPublished',)
+PRECOMPUTED = 64 # bitmaps of fields with at most as many values are built in advance
+
+
+class Filter:
+    """
+    A set of species, stored as a bitmap
+
+    Attributes
+    ----------
+    mask: np.ndarray
+        Boolean array, True for the selected rows of the species DataFrame
+
+    Operators
+    ---------
+    f & g, f | g, f ^ g, ~f
+        Intersection, union, symmetric difference and complement
+    len(f)
+        Number of selected species
+    """
+    def __init__(self, mask: np.ndarray):
+        self.mask = np.asarray(mask, dtype = bool)
+
+    def __and__(self, other):
+        return Filter(self.mask & other.mask)
+
+    def __or__(self, other):
+        return Filter(self.mask | other.mask)
+
+    def __xor__(self, other):
+        return Filter(self.mask ^ other.mask)
+
+    def __invert__(self):
+        return Filter(~self.mask)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def rows(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            The positions of the selected rows
+        """
+        return np.flatnonzero(self.mask)
+
+    def __str__(self) -> str:
+        return f"Filter({len(self)} of {len(self.mask)} species)"
+
+
+class Field:
+    """
+    Bitmap index of a categorical column
+
+    Attributes
+    ----------
+    name: str
+        Column name
+    values: list
+        The distinct values of the column (missing values excluded)
+    separator: str | None
+        If given, each value is a list of tokens (e.g. 'Terrestrial|Marine')
+        and contains() selects the species having a token among them
+    """
+    def __init__(self, name: str, column: pd.Series | np.ndarray, separator: str = None):
+        self.name = name
+        self.separator = separator
+        codes, uniques = pd.factorize(np.asarray(column, dtype = object)) # missing values -> -1
+        self._codes = codes.astype(np.int32)
+        self.values = list(uniques)
+        self._positions = {value: code for code, value in enumerate(self.values)}
+        self._bitmaps = {}
+        if len(self.values) <= PRECOMPUTED:
+            for code in range(len(self.values)):
+                self._bitmap(code)
+        self._tokens = {}
+        if separator is not None:
+            for code, value in enumerate(self.values):
+                for token in str(value).split(separator):
+                    self._tokens.setdefault(token.strip(), []).append(code)
+
+    def _bitmap(self, code: int) -> np.ndarray:
+        if code not in self._bitmaps: # computed once, on first use
+            self._bitmaps[code] = self._codes == code
+        return self._bitmaps[code]
+
+    def __eq__(self, value) -> Filter:
+        if value not in self._positions:
+            return Filter(np.zeros(len(self._codes), dtype = bool))
+        return Filter(self._bitmap(self._positions[value]))
+
+    def __ne__(self, value) -> Filter:
+        return ~(self == value) & ~self.isna()
+
+    def isin(self, values) -> Filter:
+        mask = np.zeros(len(self._codes), dtype = bool)
+        for value in values:
+            mask |= (self == value).mask
+        return Filter(mask)
+
+    def contains(self, token: str) -> Filter:
+        """
+        Selects the species whose value includes token (plain equality
+        if the field has no separator)
+        """
+        if self.separator is None:
+            return self == token
+        return self.isin([self.values[code] for code in self._tokens.get(token, [])])
+
+    def isna(self) -> Filter:
+        return Filter(self._codes == -1)
+
+    def counts(self, where: Filter = None) -> pd.Series:
+        """
+        Returns
+        -------
+        pd.Series
+            Number of species for each value (within where, if given),
+            like DataFrame.value_counts()
+        """
+        codes = self._codes if where is None else self._codes[where.mask]
+        counts = np.bincount(codes[codes >= 0], minlength = len(self.values))
+        return pd.Series(counts, index = self.values, name = 'count').sort_values(ascending = False)
+
+    __hash__ = None # __eq__ returns a Filter
+
+
+class RangeField:
+    """
+    Index of a numeric column, filtered by comparisons: index.yearPublished >= 2020
+    """
+    def __init__(self, name: str, column: pd.Series | np.ndarray):
+        self.name = name
+        self._values = np.asarray(column, dtype = float) # missing values -> nan, never selected
+
+    def __lt__(self, value) -> Filter:
+        return Filter(self._values < value)
+
+    def __le__(self, value) -> Filter:
+        return Filter(self._values <= value)
+
+    def __gt__(self, value) -> Filter:
+        return Filter(self._values > value)
+
+    def __ge__(self, value) -> Filter:
+        return Filter(self._values >= value)
+
+    def __eq__(self, value) -> Filter:
+        return Filter(self._values == value)
+
+    def between(self, low, high) -> Filter:
+        """
+        Selects low <= value <= high
+        """
+        return (self >= low) & (self <= high)
+
+    __hash__ = None
+
+
+class SpeciesIndex:
+    """
+    Bitmap indexes of the species DataFrame, optionally enriched
+    with the realm, systems and yearPublished of their assessments
+
+    Attributes
+    ----------
+    species: pd.DataFrame
+        The indexed DataFrame, structured like 'simple_summary.csv'
+    fields: dict[str, Field | RangeField]
+        The indexes, also reachable as attributes (index.className)
+        or items (index['className'])
+
+    Methods
+    -------
+    where(**conditions) -> Filter
+        Intersection of equalities, or contains() for multi-valued fields
+    select(selection) -> pd.DataFrame
+        The selected rows, ready for charts, TaxonTree.add_animals, build_tree...
+    """
+    def __init__(self, species: pd.DataFrame, assessments: pd.DataFrame = None):
+        self.species = species
+        self.fields = {}
+        for column in CATEGORICAL:
+            self.fields[column] = Field(column, species[column])
+        if assessments is not None:
+            if assessments.index.name != 'assessmentId':
+                assessments = assessments.set_index('assessmentId')
+            # row of each species' assessment, -1 when missing
+            positions = assessments.index.get_indexer(species['assessmentId'])
+            for column in MULTIVALUED + NUMERIC:
+                values = assessments[column].to_numpy(dtype = object)[positions]
+                values[positions == -1] = np.nan
+                if column in NUMERIC:
+                    self.fields[column] = RangeField(column, values)
+                else:
+                    self.fields[column] = Field(column, values, separator = '|')
+
+    @classmethod
+    def from_shared(cls, dataset):
+        """
+        Builds the indexes of a shared.SharedDataset, reading only the needed columns
+        """
+        species = dataset.species.to_frame(['assessmentId', *CATEGORICAL])
+        assessments = dataset.assessments.to_frame(['assessmentId', *MULTIVALUED, *NUMERIC])
+        index = cls(species, assessments)
+        index.species = dataset.species.to_frame() # select() returns every column
+        return index
+
+    def __getitem__(self, name: str) -> Field | RangeField:
+        return self.fields[name] # KeyError if not indexed
+
+    def __getattr__(self, name: str) -> Field | RangeField:
+        if name != 'fields' and name in self.fields:
+            return self.fields[name]
+        raise AttributeError(name)
+
+    def all(self) -> Filter:
+        return Filter(np.ones(len(self.species), dtype = bool))
+
+    def where(self, **conditions) -> Filter:
+        """
+        e.g. index.where(className = 'AVES', systems = 'Marine', yearPublished = 2020)
+        """
+        selection = self.all()
+        for name, value in conditions.items():
+            field = self[name]
+            selection &= (field == value) if isinstance(field, RangeField) else field.contains(value)
+        return selection
+
+    def select(self, selection: Filter) -> pd.DataFrame:
+        return self.species.iloc[selection.rows()]
+
+# test library
+if __name__ == '__main__':
+    import synthetic
+    species = synthetic.make_species(10000)
+    index = SpeciesIndex(species, synthetic.make_assessments(species))
+    selection = ((index.className == 'AVES') & (index.redlistCategory == 'Endangered')
+                 & (index.populationTrend == 'Decreasing') & index.systems.contains('Marine'))
+    print(selection)
+    print(index.select(selection)[['scientificName', 'className', 'redlistCategory']].head())
+    print(index.redlistCategory.counts(index.where(className = 'MAMMALIA')))
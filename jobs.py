@@ -0,0 +1,231 @@
+import threading
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from profiler import profiler
+
+# Background jobs let the menus return immediately while downloads, offline pages
+# and tree exports run in a pool of threads. A job function can report its
+# progress and honour cancellation by calling checkpoint() now and then:
+# outside of a job checkpoint() does nothing, so the same functions still
+# work when called directly.
+
+QUEUED, RUNNING, CANCELLING, DONE, FAILED, CANCELLED = (
+    'queued', 'running', 'cancelling', 'done', 'failed', 'cancelled')
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_local = threading.local() # the job run by the current thread, if any
+
+
+class Cancelled(Exception):
+    """
+    Raised by checkpoint() inside a job whose cancellation was requested
+    """
+
+
+def checkpoint(progress: float = None, message: str = None) -> None:
+    """
+    Updates the progress (from 0 to 1) and the message of the current job
+
+    Raises
+    ------
+    Cancelled
+        If the current job has to stop
+    """
+    job = getattr(_local, 'job', None)
+    if job is None: # not running as a background job
+        return
+    if progress is not None:
+        job.progress = progress
+    if message is not None:
+        job.message = message
+    if job._cancel.is_set():
+        raise Cancelled()
+
+
+class Job:
+    """
+    Attributes
+    ----------
+    id: int
+        Progressive identifier, shown to the user
+    label: str
+        Description of the job (i.g. 'Download image of Panthera leo')
+    status: str
+        One of 'queued', 'running', 'cancelling', 'done', 'failed', 'cancelled'
+    progress: float | None
+        From 0 to 1, when the job reports it
+    message: str
+        Last message reported by the job
+    result
+        Returned value of the job function, when done
+    error: Exception | None
+        Raised exception, when failed
+    on_done: callable | None
+        Called with the job itself by JobQueue.poll() when the job is done,
+        thereby in the main thread (e.g. to open a matplotlib window)
+    """
+    def __init__(self, id: int, label: str, on_done: callable = None):
+        self.id = id
+        self.label = label
+        self.status = QUEUED
+        self.progress = None
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.on_done = on_done
+        self.future = None
+        self._cancel = threading.Event()
+        self._notified = False
+
+    def __str__(self) -> str:
+        status = self.status
+        if status == RUNNING and self.progress is not None:
+            status += f" {self.progress:.0%}"
+        if status == FAILED:
+            status += f" ({type(self.error).__name__}: {self.error})"
+        elif self.message:
+            status += f" ({self.message})"
+        return f"[{self.id}] {self.label}: {status}"
+
+
+class JobQueue:
+    """
+    A queue of background jobs executed by a pool of worker threads
+
+    Methods
+    -------
+    submit(label, func, *args, on_done = None) -> Job
+        Queues func(*args) and returns immediately
+    cancel(job_id) -> bool
+        Cancels a queued job, or asks a running one to stop
+    poll() -> list[Job]
+        Jobs finished since the last call (to be notified to the user)
+    shutdown(wait = True)
+        Waits for all the jobs, the queued ones included
+    """
+    def __init__(self, workers: int = 2):
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix = 'job')
+        self._jobs = {}
+        self._lock = threading.Lock() # guards ids and every change of status
+        self._last_id = 0
+
+    def submit(self, label: str, func: callable, *args, on_done: callable = None) -> Job:
+        with self._lock:
+            self._last_id += 1
+            job = Job(self._last_id, label, on_done)
+            self._jobs[job.id] = job
+        job.future = self._pool.submit(self._run, job, func, args)
+        return job
+
+    def _run(self, job: Job, func: callable, args: tuple) -> None:
+        # executed by a worker thread
+        with self._lock:
+            if job._cancel.is_set():
+                job.status = CANCELLED
+                return
+            job.status = RUNNING
+        _local.job = job
+        status = FAILED
+        try:
+            with profiler.profiling_thread(): # see the --profile option of launcher.py
+                job.result = func(*args)
+            job.progress = 1.0
+            job.message = ''
+            status = DONE
+        except Cancelled:
+            status = CANCELLED
+        except Exception as error:
+            job.error = error
+        finally:
+            _local.job = None
+            with self._lock: # cancel() can not overwrite a final status
+                job.status = status
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Returns
+        -------
+        bool
+            False if no such job exists or it has already finished
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            job._cancel.set()
+            if job.future.cancel(): # still in the queue: it will never run
+                job.status = CANCELLED
+            elif job.status == RUNNING:
+                job.status = CANCELLING # stops at its next checkpoint()
+            return True
+
+    def poll(self) -> list[Job]:
+        """
+        Returns the jobs finished since the last call, after running
+        the on_done callback of those which are done (in the calling thread).
+        A job whose callback raises an exception is reported as failed
+        """
+        finished = []
+        for job in list(self._jobs.values()):
+            if job.status in FINISHED and not job._notified and (job.future is None or job.future.done()):
+                job._notified = True
+                finished.append(job)
+                if job.status == DONE and job.on_done is not None:
+                    try:
+                        job.on_done(job)
+                    except Exception as error: # i.g. a downloaded file which is not an image
+                        with self._lock:
+                            job.error = error
+                            job.status = FAILED
+        return finished
+
+    def active(self) -> list[Job]:
+        return [job for job in self._jobs.values() if job.status not in FINISHED]
+
+    def shutdown(self, wait: bool = True) -> None:
+        # no job is dropped: the user can cancel them beforehand.
+        # Waiting on the futures, unlike joining the threads, can be
+        # interrupted (Ctrl-C) and called again
+        if wait:
+            futures.wait([job.future for job in self])
+        self._pool.shutdown(wait = wait)
+
+    def __getitem__(self, job_id: int) -> Job:
+        return self._jobs.get(job_id) # no KeyError raised
+
+    def __iter__(self):
+        return iter(list(self._jobs.values()))
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __str__(self) -> str:
+        if not self._jobs:
+            return "No background jobs"
+        return '\n'.join(str(job) for job in self)
+
+    def print(self) -> None:
+        print(self)
+
+# test library
+if __name__ == '__main__':
+    from time import sleep
+
+    def count(n):
+        for i in range(n):
+            checkpoint(i/n, f"{i} of {n}")
+            sleep(0.1)
+        return n
+
+    queue = JobQueue(workers = 1)
+    first = queue.submit('count to 5', count, 5, on_done = lambda job: print('result:', job.result))
+    second = queue.submit('count to 50', count, 50)
+    third = queue.submit('count to 3', count, 3)
+    sleep(0.25)
+    queue.print()
+    queue.cancel(third.id)
+    sleep(0.5)
+    queue.cancel(second.id)
+    queue.shutdown()
+    for job in queue.poll():
+        print(job)
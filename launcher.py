@@ -9,11 +9,12 @@ CHANGELOG:
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import sys
-from time import time
+import sys, os, argparse
 from trees import TaxonTree
 from animals import Animal
 from menu import Menu
+from profiler import profiler, measuring, profiled, ask
+from jobs import JobQueue, Cancelled, checkpoint
 
 import explore, charts, downloader
 
@@ -23,18 +24,87 @@ if sys.version_info.major < 3 or sys.version_info.minor < 10:
     raise SyntaxError(f"Python version running: {sys.version}\n"
                       f"Python 3.10 or newer is required")
 
+background = JobQueue() # downloads, offline pages and tree exports run here
+
+
+def notify() -> None:
+    """
+    Prints the background jobs finished since the last prompt
+    """
+    for job in background.poll():
+        print(job)
+
+
+def submit(label: str, func: callable, *args, on_done: callable = None) -> int:
+    """
+    Starts func(*args) in background and returns immediately the job id
+    """
+    job = background.submit(label, func, *args, on_done = on_done)
+    print(f"Job {job.id} started in background: {job.label}")
+    return job.id
+
+
+def watch_offline(animal: Animal) -> int:
+    return submit(f"Offline page of {animal.name}", explore.watch_offline, animal)
+
+
+@profiled('launcher.download')
+def download(animal: Animal) -> int | None:
+    """
+    Displays the local image of the animal or, if missing or if the user
+    wants to download it again, fetches it in background and displays it when done
+
+    Returns
+    -------
+    int | None
+        The id of the download job, None if the local image was displayed
+    """
+    path = downloader.image_path(animal)
+    if os.path.exists(path): # the question must be asked now, not in background
+        choice = ask("Image already existing. Download again (Y/N)? ")
+        if choice.lower() not in ['y', 'yes']:
+            downloader.show(path)
+            return None
+
+    def on_done(job): # matplotlib windows are opened by the main thread
+        if job.result == 0:
+            downloader.show(path)
+        else:
+            print(f"Image of {animal.name} not found. Check your internet connection")
+    return submit(f"Download image of {animal.name}", downloader.fetch, animal, False, on_done = on_done)
+
+
+def save_tree(species: pd.DataFrame) -> int:
+    filename = ask("File name (taxonomic-tree.txt): ") or 'taxonomic-tree.txt'
+    def on_done(job):
+        if not job.result:
+            print(f"Failed attempt to save the taxonomic tree as '{filename}'")
+    return submit(f"Save taxonomic tree as '{filename}'", print_tree, species, filename, False, on_done = on_done)
+
+
+def manage_jobs():
+    background.print()
+    job_id = ask("Digit a job id to cancel it (nothing to go back): ")
+    if job_id:
+        if job_id.isdigit() and background.cancel(int(job_id)):
+            print(f"Job {job_id} cancelled")
+        else:
+            print('No such running job. Retry.')
+
+
 def search(animal: Animal):
     search_options = [('1', 'View on the website', explore.watch_online),
-                      ('2', 'View full information offline', explore.watch_offline),
-                      ('3', 'Download image', downloader.download),
+                      ('2', 'View full information offline', watch_offline),
+                      ('3', 'Download image', download),
                       ('X', 'Back to the main menu', lambda x: None)]
     search_menu = Menu('SEARCH MENU', search_options)
 
     print(f"\n{animal}")
     choice = ''
     while choice != 'X' and animal.is_listed:
+        notify()
         search_menu.print()
-        choice = input("Choose action: ").upper()
+        choice = ask("Choose action: ").upper()
         search_menu.execute(choice, animal)
 
     choice = '' # setting choice back to void character in order not to quit main()
@@ -44,7 +114,7 @@ def graphics():
     def plot_a_class(species: pd.DataFrame):
         classes = set(species['className']) # set of all available classes
         print(*classes, sep = ', ')
-        class_to_plot = input("Digit a class to be plotted: ").upper()
+        class_to_plot = ask("Digit a class to be plotted: ").upper()
         if class_to_plot not in classes:
             print('Non-listed class. Retry.')
         else:
@@ -59,8 +129,9 @@ def graphics():
 
     choice = ''
     while choice != 'X':
+        notify()
         graphics_menu.print()    
-        choice = input("Choose action: ").upper()
+        choice = ask("Choose action: ").upper()
         graphics_menu.execute(choice, Animal.species)       
 
     choice = '' # setting choice back to void character in order not to quit main()
@@ -70,15 +141,19 @@ def print_tree(species: pd.DataFrame, filename = 'taxonomic-tree.txt', verbose =
     if verbose:
         print('Wait a few seconds...')
     try:
-        tree = TaxonTree('Animal')
-        start = time()
-        tree.add_animals(species)
-        with open(filename, 'w') as output:
-            output.write(str(tree))
-        end = time()
+        with measuring('print_tree') as timing:
+            tree = TaxonTree('Animal')
+            tree.add_animals(species)
+            with measuring('str(TaxonTree)'):
+                text = str(tree)
+            checkpoint(None, 'writing the file') # last chance to cancel
+            with open(filename, 'w') as output:
+                output.write(text)
         if verbose:
-            print(f"Taxonomic tree successfully saved as '{filename}' in {end-start:.2f}s")
+            print(f"Taxonomic tree successfully saved as '{filename}' in {timing['seconds']:.2f}s")
         return True # positive exit-status
+    except Cancelled: # background job cancelled, let jobs.py know
+        raise
     except: 
         if verbose:
             print('Failed attempt to save the taxonomic tree')
@@ -88,27 +163,56 @@ def print_tree(species: pd.DataFrame, filename = 'taxonomic-tree.txt', verbose =
 def main():
     main_options = [('1', 'Find animal', search),
                     ('2', 'Show data graphics', graphics),
-                    ('3', 'Save taxonomic tree into a txt file', print_tree),
+                    ('3', 'Save taxonomic tree into a txt file', save_tree),
+                    ('4', 'Show or cancel background jobs', manage_jobs),
                     ('X', 'Exit', lambda x: None)]
     main_menu = Menu('MAIN MENU', main_options)
     choice = ''
     while choice != 'X':
+        notify()
         main_menu.print()
-        choice = input("Choose action: ").upper()
+        choice = ask("Choose action: ").upper()
         plt.ion() # interactive: on. 
         # It allows to keep all matplotlib windows open without any pausing
 
         if choice == '1':
-            animal = Animal(input('Enter common or scientific name: '))
+            animal = Animal(ask('Enter common or scientific name: '))
             main_menu.execute('1', animal)
         if choice == '2':
             main_menu.execute('2')
         if choice == '3':
             main_menu.execute('3', Animal.species)
+        if choice == '4':
+            main_menu.execute('4')
+
+    if background.active():
+        print('Waiting for the background jobs to finish (Ctrl-C to cancel them)...')
+        background.print()
+    try:
+        background.shutdown() # queued jobs are run too
+    except KeyboardInterrupt:
+        for job in background.active():
+            background.cancel(job.id)
+        print('Cancelling the background jobs...')
+        background.shutdown() # running jobs stop at their next checkpoint()
+    notify()
 
 
 if __name__ == '__main__':
-    Animal.species = pd.read_csv("simple_summary.csv")
-    Animal.names = pd.read_csv("common_names.csv")
-    Animal.assessments = pd.read_csv("assessments.csv", index_col = 'assessmentId')
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = 'The IUCN Red List explorer')
+    parser.add_argument('--profile', action = 'store_true',
+                        help = 'dump cProfile/tracemalloc output and a summary table at exit')
+    args = parser.parse_args()
+    if args.profile:
+        profiler.enable()
+
+    try:
+        with measuring('load datasets'):
+            Animal.species = pd.read_csv("simple_summary.csv")
+            Animal.names = pd.read_csv("common_names.csv")
+            Animal.assessments = pd.read_csv("assessments.csv", index_col = 'assessmentId')
+        main()
+    finally:
+        if args.profile:
+            profiler.disable()
+            print(profiler.report('profile.prof'))
\ No newline at end of file
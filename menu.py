@@ -1,3 +1,6 @@
+from profiler import measuring
+
+
 class Menu(): 
     """
     Dict-based Menu class
@@ -61,7 +64,9 @@ class Menu():
         """
 
         if self._menu.get(idx):
-            self._menu.get(idx)['action'](*args)
+            # see profiler.py, the time spent at prompts (ask()) is not counted
+            with measuring(f"{self.title}: {self._menu.get(idx)['label']}"):
+                self._menu.get(idx)['action'](*args)
             return True
         return False
     
@@ -0,0 +1,244 @@
+import cProfile, io, pstats, threading, tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+
+class Profiler:
+    """
+    Collects wall time, call counts and peak memory
+    of named sections of the software
+
+    Attributes
+    ----------
+    stats: dict
+        A dictionary structured as following:
+        {
+            name1: {
+                'calls': int,
+                'total': float,   # seconds
+                'max': float,     # seconds
+                'peak': int|None  # bytes, None until measured
+            },
+            ...
+        }
+    enabled: bool
+        True while a full profiling session (cProfile and tracemalloc) runs.
+        Wall times and call counts are always recorded since they are cheap,
+        peak memory only during a session: tracemalloc started by someone
+        else (e.g. benchmark.measure) keeps its process-wide peak untouched.
+        Sections may run in several threads, but tracemalloc peaks are 
+        process-wide: only sections of the main thread record them (and 
+        they include the other threads' allocations), since resetting the
+        peak from another thread would lose the one of the main thread
+
+    Methods
+    -------
+    measuring(name)
+        Context manager which records a section
+    waiting()
+        Context manager whose time is not counted by the open sections
+    profiled(name)
+        Decorator which records each call of a function
+    enable() / disable()
+        Starts / stops cProfile and tracemalloc
+    profiling_thread()
+        Context manager which lets cProfile see a worker thread
+    summary() -> str
+        Table of all recorded sections
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.enabled = False
+        self._cprofile = None
+        self._thread_profiles = [] # cProfile data of the worker threads, merged by report()
+        self._snapshot = None
+        self._local = threading.local() # per-thread stack of open sections
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measuring(self, name: str):
+        """
+        Records the wall time (and the peak memory, during a session in the main thread)
+        of a with block. It yields a dict whose 'seconds' and 'peak' keys are filled on exit
+        """
+        record = {'seconds': None, 'peak': None}
+        tracing = self.enabled and threading.current_thread() is threading.main_thread()
+        stack = self._stack()
+        section = {'memory': 0, 'highest': 0, 'waiting': 0.0}
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack: # the peak is about to be reset, the enclosing section keeps it
+                stack[-1]['highest'] = max(stack[-1]['highest'], peak)
+            tracemalloc.reset_peak()
+            section['memory'] = section['highest'] = current
+        stack.append(section)
+        start = perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = perf_counter() - start - section['waiting']
+            stack.pop()
+            if tracing:
+                highest = max(section['highest'], tracemalloc.get_traced_memory()[1])
+                record['peak'] = highest - section['memory']
+                if stack:
+                    stack[-1]['highest'] = max(stack[-1]['highest'], highest)
+            self._add(name, record)
+
+    @contextmanager
+    def waiting(self):
+        """
+        Excludes the with block (e.g. the user typing an answer) from
+        the wall time of the sections open in the current thread
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            for section in self._stack():
+                section['waiting'] += elapsed
+
+    def _stack(self) -> list:
+        # memory at entry, highest peak seen and time spent waiting
+        # of each open section of the current thread
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def profiled(self, name: str = None):
+        """
+        Decorator version of measuring(), name defaults to the function's qualified name
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.measuring(name or func.__qualname__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _add(self, name: str, record: dict) -> None:
+        with self._lock:
+            stat = self.stats.setdefault(name, {'calls': 0, 'total': 0.0, 'max': 0.0, 'peak': None})
+            stat['calls'] += 1
+            stat['total'] += record['seconds']
+            stat['max'] = max(stat['max'], record['seconds'])
+            if record['peak'] is not None:
+                stat['peak'] = max(stat['peak'] or 0, record['peak'])
+
+    def enable(self) -> None:
+        """
+        Starts cProfile and tracemalloc
+        """
+        if not self.enabled:
+            tracemalloc.start()
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+            self.enabled = True
+
+    @contextmanager
+    def profiling_thread(self):
+        """
+        cProfile only hooks the thread which enabled it, so the work done by
+        other threads (e.g. background jobs, see jobs.py) must run in here
+        to appear in report()
+        """
+        profile = None
+        if self.enabled and threading.current_thread() is not threading.main_thread():
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError: # Python 3.12+: the session's profiler already sees every thread
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._thread_profiles.append(profile)
+
+    def disable(self) -> None:
+        """
+        Stops cProfile and tracemalloc, keeping their results for report()
+        """
+        if self.enabled:
+            self._cprofile.disable()
+            self._snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.enabled = False
+
+    def summary(self) -> str:
+        """
+        Returns
+        -------
+        str
+            A table with a line per section, the slowest ones first
+        """
+        string = f"{'section':<48}{'calls':>7}{'total s':>10}{'mean s':>10}{'max s':>10}{'peak MiB':>10}\n"
+        with self._lock:
+            stats = dict(self.stats)
+        for name, stat in sorted(stats.items(), key = lambda item: -item[1]['total']):
+            peak = '-' if stat['peak'] is None else f"{stat['peak']/2**20:.1f}"
+            string += (f"{name[:47]:<48}{stat['calls']:>7}{stat['total']:>10.3f}"
+                       f"{stat['total']/stat['calls']:>10.3f}{stat['max']:>10.3f}{peak:>10}\n")
+        return string
+
+    def report(self, filename: str = 'profile.prof', top: int = 15) -> str:
+        """
+        Saves cProfile data into filename (readable by pstats or snakeviz)
+
+        Returns
+        -------
+        str
+            The summary table, the top cumulative-time functions
+            and the top memory-allocating source lines
+        """
+        string = f"\nSESSION SUMMARY\n{self.summary()}"
+        if self._cprofile is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(self._cprofile, stream = stream)
+            with self._lock:
+                for profile in self._thread_profiles:
+                    stats.add(profile)
+            stats.dump_stats(filename)
+            stats.sort_stats('cumulative').print_stats(top)
+            string += f"\nCPROFILE (saved as '{filename}')\n{stream.getvalue()}"
+        if self._snapshot is not None:
+            string += "\nTRACEMALLOC (top allocations still alive at the end)\n"
+            for stat in self._snapshot.statistics('lineno')[:top]:
+                string += f"{stat}\n"
+        return string
+
+    def print(self) -> None:
+        print(self.summary())
+
+
+profiler = Profiler() # shared by all modules of the software
+measuring = profiler.measuring
+profiled = profiler.profiled
+
+
+def ask(prompt: str = '') -> str:
+    """
+    input() which does not count the time spent by the user
+    to answer in the sections being measured
+    """
+    with profiler.waiting():
+        return input(prompt)
+
+# test library
+if __name__ == '__main__':
+    @profiled()
+    def squares(n):
+        return [i*i for i in range(n)]
+
+    profiler.enable()
+    with measuring('outer'):
+        squares(10**5)
+        squares(10**6)
+    profiler.disable()
+    print(profiler.report(top = 5))
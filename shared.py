@@ -0,0 +1,278 @@
+import json, os
+import numpy as np
+import pandas as pd
+
+# A read-only on-disk copy of the datasets that many processes can attach to at once.
+# Each column is a file which is memory-mapped, so workers share the operating system's
+# page cache instead of re-parsing the CSVs or receiving pickled DataFrames.
+#
+# folder/
+#     meta.json                       rows and column kinds of each table
+#     <table>/<column>.npy            numeric and boolean columns
+#     <table>/<column>.offsets.npy    string columns: n+1 byte offsets into...
+#     <table>/<column>.heap           ...the utf-8 strings, one after the other
+#     <table>/<column>.nulls.npy      string columns with missing values only
+#     <table>/<column>.codes.npy      categorical columns: index of each row's
+#                                     value in a (small) string heap, -1 if missing
+
+VERSION = 1
+TABLES = ('species', 'names', 'assessments')
+
+
+def _write_heap(path: str, strings) -> None:
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded)+1, dtype = np.int64)
+    np.cumsum([len(string) for string in encoded], out = offsets[1:])
+    np.save(f"{path}.offsets.npy", offsets)
+    with open(f"{path}.heap", 'wb') as heap:
+        heap.write(b''.join(encoded))
+
+
+def _write_column(path: str, column: pd.Series) -> dict:
+    """
+    Writes a DataFrame column in the most compact of the three formats
+
+    Returns
+    -------
+    dict
+        The description of the column saved in meta.json
+    """
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        values = column.to_numpy()
+        np.save(f"{path}.npy", values)
+        return {'kind': 'numeric', 'dtype': values.dtype.str}
+
+    nulls = column.isna().to_numpy()
+    categories = pd.unique(column[~nulls])
+    if len(categories) < 2**15 and len(categories) <= len(column)//4: # few distinct values
+        codes = pd.Categorical(column, categories = categories).codes.astype(np.int16)
+        np.save(f"{path}.codes.npy", codes)
+        _write_heap(path, [str(category) for category in categories])
+        return {'kind': 'category', 'categories': len(categories)}
+
+    _write_heap(path, ['' if null else str(value) for value, null in zip(column, nulls)])
+    if nulls.any():
+        np.save(f"{path}.nulls.npy", nulls)
+    return {'kind': 'string', 'nulls': bool(nulls.any())}
+
+
+def export(folder: str, species: pd.DataFrame, names: pd.DataFrame,
+           assessments: pd.DataFrame) -> None:
+    """
+    Writes the three datasets (as read from 'simple_summary.csv',
+    'common_names.csv' and 'assessments.csv') in the shared format.
+    assessments may be indexed by 'assessmentId', like Animal.assessments
+    """
+    if assessments.index.name == 'assessmentId':
+        assessments = assessments.reset_index()
+    meta = {'version': VERSION, 'tables': {}}
+    for name, table in zip(TABLES, (species, names, assessments)):
+        if not os.path.exists(os.path.join(folder, name)):
+            os.makedirs(os.path.join(folder, name))
+        columns = {}
+        for column in table.columns:
+            columns[column] = _write_column(os.path.join(folder, name, column), table[column])
+        meta['tables'][name] = {'rows': len(table), 'columns': columns}
+    # assessments are searched by id: their sorting permutation is precomputed
+    np.save(os.path.join(folder, 'assessments', 'assessmentId.order.npy'),
+            np.argsort(assessments['assessmentId'].to_numpy(), kind = 'stable'))
+    with open(os.path.join(folder, 'meta.json'), 'w') as output:
+        json.dump(meta, output, indent = 2)
+
+
+def export_csv(folder: str, source: str = '.') -> None:
+    """
+    Reads the CSV files in source and writes them in the shared format into folder
+    """
+    export(folder,
+           pd.read_csv(os.path.join(source, "simple_summary.csv")),
+           pd.read_csv(os.path.join(source, "common_names.csv")),
+           pd.read_csv(os.path.join(source, "assessments.csv")))
+
+
+class Heap:
+    """
+    Read-only sequence of strings stored in a memory-mapped heap
+    """
+    def __init__(self, path: str):
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode = 'r')
+        size = os.path.getsize(f"{path}.heap")
+        # numpy can not map empty files
+        self.heap = np.memmap(f"{path}.heap", dtype = np.uint8, mode = 'r') if size else np.empty(0, np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return self.heap[self.offsets[idx]:self.offsets[idx+1]].tobytes().decode('utf-8')
+
+    def take(self, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            An object array with the strings at positions rows (all by default)
+        """
+        if rows is None:
+            rows = np.arange(len(self))
+        starts, ends = self.offsets[rows], self.offsets[np.asarray(rows)+1]
+        data = self.heap.tobytes() if len(rows) > len(self)//8 else None # one copy beats many small ones
+        strings = np.empty(len(rows), dtype = object)
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            chunk = data[start:end] if data is not None else self.heap[start:end].tobytes()
+            strings[i] = chunk.decode('utf-8')
+        return strings
+
+
+class Table:
+    """
+    A table of a SharedDataset. Columns are attached lazily (zero-copy)
+    and materialized only by take() and to_frame()
+
+    Attributes
+    ----------
+    folder: str
+        The dataset folder
+    name: str
+        One of 'species', 'names', 'assessments'
+    rows: int
+        Number of rows
+    columns: list[str]
+        Column names, in the original order
+    """
+    def __init__(self, folder: str, name: str, meta: dict):
+        self.folder = folder
+        self.name = name
+        self.rows = meta['rows']
+        self.columns = list(meta['columns'])
+        self._meta = meta['columns']
+        self._attached = {}
+
+    def __reduce__(self): # only the path crosses process boundaries
+        return (_attach_table, (self.folder, self.name))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.folder, self.name, column)
+
+    def column(self, column: str):
+        """
+        Returns
+        -------
+        np.ndarray | Heap | tuple[np.ndarray, Heap]
+            The memory-mapped column: an array if numeric, a Heap of strings,
+            or the codes and the heap of the categories if categorical
+        """
+        if column not in self._attached:
+            kind = self._meta[column]['kind']
+            if kind == 'numeric':
+                self._attached[column] = np.load(f"{self._path(column)}.npy", mmap_mode = 'r')
+            elif kind == 'category':
+                self._attached[column] = (np.load(f"{self._path(column)}.codes.npy", mmap_mode = 'r'),
+                                          Heap(self._path(column)))
+            else:
+                self._attached[column] = Heap(self._path(column))
+        return self._attached[column]
+
+    def take(self, rows: np.ndarray = None, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        pd.DataFrame
+            A copy of the given rows (positions, all by default) and columns
+            (all by default), with the same dtypes as pd.read_csv() gives
+        """
+        rows = np.arange(self.rows) if rows is None else np.asarray(rows)
+        data = {}
+        for column in columns or self.columns:
+            kind = self._meta[column]['kind']
+            attached = self.column(column)
+            if kind == 'numeric':
+                data[column] = np.asarray(attached[rows])
+            elif kind == 'category':
+                codes, heap = attached
+                categories = np.append(heap.take(), np.nan) # code -1 picks NaN
+                data[column] = categories[codes[rows]]
+            else:
+                values = attached.take(rows)
+                if self._meta[column]['nulls']:
+                    values[np.load(f"{self._path(column)}.nulls.npy", mmap_mode = 'r')[rows]] = np.nan
+                data[column] = values
+        return pd.DataFrame(data, columns = columns or self.columns)
+
+    def to_frame(self, columns: list[str] = None) -> pd.DataFrame:
+        return self.take(None, columns)
+
+
+def _attach_table(folder: str, name: str) -> Table:
+    return SharedDataset(folder)[name]
+
+
+class SharedDataset:
+    """
+    Read-only, memory-mapped datasets written by export().
+    Attaching only reads meta.json: it takes milliseconds and, however many
+    processes attach, the data is loaded into RAM once by the operating system.
+    Pickling a SharedDataset (or a Table) only sends its folder path
+
+    Attributes
+    ----------
+    folder: str
+        The dataset folder
+    species, names, assessments: Table
+        The tables structured like 'simple_summary.csv',
+        'common_names.csv' and 'assessments.csv'
+
+    Methods
+    -------
+    assessment(assessment_id) -> pd.Series
+        The same row as Animal.assessments.loc[assessment_id]
+    """
+    def __init__(self, folder: str):
+        self.folder = os.path.abspath(folder)
+        with open(os.path.join(self.folder, 'meta.json')) as meta:
+            meta = json.load(meta)
+        if meta['version'] != VERSION:
+            raise ValueError(f"Unsupported shared dataset version {meta['version']}")
+        for name in TABLES:
+            setattr(self, name, Table(self.folder, name, meta['tables'][name]))
+        self._order = None
+
+    def __reduce__(self):
+        return (SharedDataset, (self.folder,))
+
+    def __getitem__(self, name: str) -> Table:
+        return getattr(self, name)
+
+    def assessment(self, assessment_id: int) -> pd.Series:
+        """
+        Binary search of an assessment by its id
+
+        Raises
+        ------
+        KeyError
+            If assessment_id is not listed
+        """
+        if self._order is None:
+            self._order = np.load(os.path.join(self.folder, 'assessments', 'assessmentId.order.npy'),
+                                  mmap_mode = 'r')
+        ids = self.assessments.column('assessmentId')
+        pos = np.searchsorted(ids, assessment_id, sorter = self._order)
+        if pos == len(ids) or ids[self._order[pos]] != assessment_id:
+            raise KeyError(assessment_id)
+        row = self.assessments.take([self._order[pos]])
+        return row.set_index('assessmentId').iloc[0]
+
+# test library
+if __name__ == '__main__':
+    import tempfile, synthetic
+    species = synthetic.make_species(1000)
+    names = synthetic.make_names(species)
+    assessments = synthetic.make_assessments(species)
+    with tempfile.TemporaryDirectory() as folder:
+        export(folder, species, names, assessments)
+        dataset = SharedDataset(folder)
+        print(dataset.species.take([0, 1, 2], ['scientificName', 'className', 'redlistCategory']))
+        print(dataset.assessment(species.loc[0, 'assessmentId'])[['systems', 'realm']])
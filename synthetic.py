@@ -0,0 +1,240 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Real IUCN exports cannot be redistributed (see README and the IUCN terms of use),
+# so this module fabricates datasets with the same schemas to measure the software on.
+
+CLASSES = { # className -> share of chordata species (roughly as in the Red List)
+    'ACTINOPTERYGII': 0.345,
+    'AVES': 0.215,
+    'REPTILIA': 0.165,
+    'AMPHIBIA': 0.140,
+    'MAMMALIA': 0.105,
+    'CHONDRICHTHYES': 0.023,
+    'SARCOPTERYGII': 0.003,
+    'MYXINI': 0.002,
+    'CEPHALASPIDOMORPHI': 0.002
+}
+CATEGORIES = { # redlistCategory -> share
+    'Least Concern': 0.58,
+    'Vulnerable': 0.09,
+    'Endangered': 0.09,
+    'Data Deficient': 0.10,
+    'Near Threatened': 0.07,
+    'Critically Endangered': 0.05,
+    'Extinct': 0.007,
+    'Extinct in the Wild': 0.001,
+    'Lower Risk/near threatened': 0.002
+}
+TRENDS = {'Decreasing': 0.30, 'Stable': 0.30, 'Unknown': 0.35, 'Increasing': 0.05}
+SYSTEMS = {
+    'Terrestrial': 0.35,
+    'Freshwater (=Inland waters)': 0.15,
+    'Marine': 0.15,
+    'Terrestrial|Freshwater (=Inland waters)': 0.25,
+    'Terrestrial|Marine': 0.05,
+    'Freshwater (=Inland waters)|Marine': 0.03,
+    'Terrestrial|Freshwater (=Inland waters)|Marine': 0.02
+}
+REALMS = {
+    'Neotropical': 0.25, 'Afrotropical': 0.17, 'Indomalayan': 0.17, 'Australasian': 0.10,
+    'Palearctic': 0.10, 'Nearctic': 0.05, 'Oceanian': 0.03, 'Antarctic': 0.01,
+    'Afrotropical|Palearctic': 0.04, 'Nearctic|Neotropical': 0.03, np.nan: 0.05
+}
+LANGUAGES = ('English', 'Spanish; Castilian', 'French')
+SYLLABLES = ('ka', 'ro', 'mi', 'tus', 'ne', 'la', 'pho', 'ri', 'sa', 'cen',
+             'do', 'gu', 'ti', 'an', 'bel', 'cro', 'ly', 'mar', 'nos', 'pe')
+WORDS = ('Spotted', 'Lesser', 'Giant', 'Mountain', 'River', 'Forest', 'Golden',
+         'Striped', 'Pygmy', 'Northern', 'Frog', 'Gecko', 'Warbler', 'Shark',
+         'Bat', 'Snake', 'Toad', 'Owl', 'Catfish', 'Salamander', 'Shrew', 'Finch')
+ASSESSMENT_TEXTS = ('rationale', 'habitat', 'threats', 'population',
+                    'range', 'useTrade', 'conservationActions')
+
+
+def _latin(idx: int) -> str:
+    """
+    Returns
+    -------
+    str
+        A pseudo-latin word which is unique for each non-negative idx
+        (bijective base len(SYLLABLES) encoding, at least two syllables long)
+    """
+    word = ''
+    idx += len(SYLLABLES) + 1 # bijective numeration, skipping one-syllable words
+    while idx > 0:
+        idx, rest = divmod(idx - 1, len(SYLLABLES))
+        word += SYLLABLES[rest]
+    return word
+
+
+def _choice(rng: np.random.Generator, shares: dict, n: int) -> np.ndarray:
+    """
+    Draws n values among the keys of shares, weighted by its (normalized) values
+    """
+    values = np.empty(len(shares), dtype = object)
+    values[:] = list(shares)
+    weights = np.array(list(shares.values()))
+    return values[rng.choice(len(values), size = n, p = weights/weights.sum())]
+
+
+def _group(rng: np.random.Generator, n: int, mean_size: float) -> np.ndarray:
+    """
+    Splits n items into consecutive groups of random (geometric) size
+
+    Returns
+    -------
+    np.ndarray
+        The group id of each of the n items
+    """
+    sizes = rng.geometric(1/mean_size, size = n) # n groups are always enough
+    return np.repeat(np.arange(n), sizes)[:n]
+
+
+def make_species(n_species: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame structured like 'simple_summary.csv' with n_species rows
+    """
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(n_species, np.array(list(CLASSES.values()))/sum(CLASSES.values()))
+    columns = {'className': [], 'orderName': [], 'familyName': [], 'genusName': [], 'speciesName': []}
+    genera = 0 # global counters keep every taxon name unique across classes
+    families = 0
+    orders = 0
+    for classname, count in zip(CLASSES, counts):
+        genus = _group(rng, count, 4) # ~4 species per genus
+        family = _group(rng, genus[-1]+1 if count else 0, 6)[genus] # ~6 genera per family
+        order = _group(rng, family[-1]+1 if count else 0, 8)[family] # ~8 families per order
+        columns['className'] += [classname]*count
+        columns['orderName'] += [f"{_latin(orders+o).upper()}IFORMES" for o in order]
+        columns['familyName'] += [f"{_latin(families+f).upper()}IDAE" for f in family]
+        columns['genusName'] += [_latin(genera+g).capitalize() for g in genus]
+        columns['speciesName'] += [_latin(len(columns['speciesName'])+i) for i in range(count)]
+        if count:
+            genera += genus[-1]+1
+            families += family[-1]+1
+            orders += order[-1]+1
+
+    species = pd.DataFrame(columns)
+    species['scientificName'] = species['genusName'] + ' ' + species['speciesName']
+    # sampled among 200*n_species ids without building them (Floyd's algorithm)
+    species['assessmentId'] = 400_000 + rng.choice(200*n_species, size = n_species, replace = False)
+    species['internalTaxonId'] = np.arange(10_000, 10_000 + n_species)
+    species['kingdomName'] = 'ANIMALIA'
+    species['phylumName'] = 'CHORDATA'
+    species['infraType'] = np.nan
+    species['infraName'] = np.nan
+    species['infraAuthority'] = np.nan
+    species['authority'] = [f"({_latin(a).capitalize()}, {y})" for a, y in
+                            zip(rng.integers(0, 5000, n_species), rng.integers(1758, 2023, n_species))]
+    species['redlistCategory'] = _choice(rng, CATEGORIES, n_species)
+    species['redlistCriteria'] = pd.Series('B1ab(iii)', index = species.index).where(
+        species['redlistCategory'].isin(['Vulnerable', 'Endangered', 'Critically Endangered']))
+    species['criteriaVersion'] = 3.1
+    species['populationTrend'] = _choice(rng, TRENDS, n_species)
+    species['scopes'] = 'Global'
+    species = species.iloc[rng.permutation(n_species)].reset_index(drop = True) # real rows are not sorted
+    return species[['assessmentId', 'internalTaxonId', 'scientificName', 'kingdomName',
+                    'phylumName', 'orderName', 'className', 'familyName', 'genusName',
+                    'speciesName', 'infraType', 'infraName', 'infraAuthority', 'authority',
+                    'redlistCategory', 'redlistCriteria', 'criteriaVersion', 'populationTrend', 'scopes']]
+
+
+def make_names(species: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame structured like 'common_names.csv'.
+        About 3 species out of 4 have common names, one of which is the main English one
+    """
+    rng = np.random.default_rng(seed + 1)
+    named = species.loc[rng.random(len(species)) < 0.75, ['internalTaxonId', 'scientificName']]
+    per_species = rng.integers(1, 4, size = len(named)) # 1 to 3 names each
+    names = named.loc[named.index.repeat(per_species)].reset_index(drop = True)
+    first = np.r_[True, names['internalTaxonId'].values[1:] != names['internalTaxonId'].values[:-1]]
+    words = np.array(WORDS)
+    # every name embeds its row position, thereby it is unique
+    names['name'] = [f"{a} {b} {_latin(i).capitalize()}" for a, b, i in zip(
+        words[rng.integers(0, len(words), len(names))],
+        words[rng.integers(0, len(words), len(names))],
+        np.arange(len(names)))]
+    names['language'] = np.where(first, LANGUAGES[0],
+                                 np.array(LANGUAGES)[rng.integers(0, len(LANGUAGES), len(names))])
+    names['main'] = first
+    return names[['internalTaxonId', 'scientificName', 'name', 'language', 'main']]
+
+
+def make_assessments(species: pd.DataFrame, seed: int = 0, text_length: int = 400) -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame structured like 'assessments.csv', whose long html texts
+        are about text_length characters each
+    """
+    rng = np.random.default_rng(seed + 2)
+    n = len(species)
+    # a small pool of paragraphs keeps the generation fast even for 1M species
+    pool = []
+    for _ in range(64):
+        sentence = ' '.join(_latin(int(w)) for w in rng.integers(0, 8000, 12))
+        pool.append(f"<p>{(sentence.capitalize() + '. ')*(text_length//len(sentence) + 1)}"[:text_length] + "</p>")
+    pool = np.array(pool, dtype = object)
+
+    assessments = species[['assessmentId', 'internalTaxonId', 'scientificName', 'redlistCategory',
+                           'redlistCriteria']].copy()
+    assessments['yearPublished'] = rng.integers(2008, 2023, n)
+    assessments['assessmentDate'] = pd.to_datetime(
+        assessments['yearPublished'].astype(str)).dt.strftime('%Y-%m-%d 00:00:00 UTC')
+    assessments['criteriaVersion'] = 3.1
+    assessments['language'] = 'English'
+    for column in ASSESSMENT_TEXTS:
+        assessments[column] = pool[rng.integers(0, len(pool), n)]
+    assessments['populationTrend'] = species['populationTrend']
+    assessments['systems'] = _choice(rng, SYSTEMS, n)
+    assessments['realm'] = _choice(rng, REALMS, n)
+    assessments['yearLastSeen'] = np.nan
+    assessments['possiblyExtinct'] = False
+    assessments['possiblyExtinctInTheWild'] = False
+    assessments['scopes'] = 'Global'
+    return assessments[['assessmentId', 'internalTaxonId', 'scientificName', 'redlistCategory',
+                        'redlistCriteria', 'yearPublished', 'assessmentDate', 'criteriaVersion',
+                        'language', 'rationale', 'habitat', 'threats', 'population',
+                        'populationTrend', 'range', 'useTrade', 'systems', 'conservationActions',
+                        'realm', 'yearLastSeen', 'possiblyExtinct', 'possiblyExtinctInTheWild', 'scopes']]
+
+
+def generate(n_species: int, folder: str = '.', seed: int = 0, text_length: int = 400) -> dict[str, str]:
+    """
+    Writes 'simple_summary.csv', 'common_names.csv' and 'assessments.csv'
+    into folder. The output only depends on n_species, seed and text_length
+
+    Returns
+    -------
+    dict[str, str]
+        The path of each written file, keyed by its file name
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    species = make_species(n_species, seed)
+    tables = {
+        'simple_summary.csv': species,
+        'common_names.csv': make_names(species, seed),
+        'assessments.csv': make_assessments(species, seed, text_length)
+    }
+    paths = {}
+    for filename, table in tables.items():
+        paths[filename] = os.path.join(folder, filename)
+        table.to_csv(paths[filename], index = False)
+    return paths
+
+# test library
+if __name__ == "__main__":
+    species = make_species(10)
+    print(species[['scientificName', 'className', 'orderName', 'familyName', 'redlistCategory']])
+    print(make_names(species).head())
+    print(make_assessments(species)[['assessmentId', 'systems', 'realm']].head())
@@ -1,6 +1,17 @@
 from animals import Animal
+from profiler import profiled
+from jobs import checkpoint
+from concurrent.futures import ProcessPoolExecutor
+import os
 import pandas as pd
 
+# columns of 'simple_summary.csv' from the highest taxon to the species,
+# together with the corresponding attributes of an Animal object
+TAXONOMIC_LEVELS = ('kingdomName', 'phylumName', 'className', 'orderName',
+                    'familyName', 'genusName', 'scientificName')
+ANIMAL_ATTRIBUTES = ('kingdom', 'phylum', 'classis', 'order',
+                     'family', 'genus', 'name')
+
 class BSTree:
     """
     Binary Search Tree implemented like in
@@ -135,9 +146,18 @@ class TaxonTree(Tree):
     """
     TaxonTree inherits most properties from the class Tree,
     but contains methods more specific to save a set of animals
+
+    Attributes
+    ----------
+    levels: tuple[str]
+        The taxonomic levels (columns of 'simple_summary.csv')
+        appended below the root, from top_level down to the species.
+        By default the root stands for the kingdom and its
+        children are phyla, as in 'taxonomic-tree.txt'
     """
-    def __init__(self, highest_taxon):
+    def __init__(self, highest_taxon, top_level = 'phylumName'):
         super().__init__(highest_taxon) # inheritance from Tree
+        self.levels = TAXONOMIC_LEVELS[TAXONOMIC_LEVELS.index(top_level):]
 
     def add_animal(self, animal: Animal | pd.Series):
         """
@@ -151,24 +171,13 @@ class TaxonTree(Tree):
 
         taxonomic_levels = ()
         if isinstance(animal, Animal): # taxonomic_levels when animal is an Animal object
-            taxonomic_levels = (
-                animal.phylum,
-                animal.classis,
-                animal.order,
-                animal.family,
-                animal.genus,
-                animal.name
+            taxonomic_levels = tuple(
+                getattr(animal, ANIMAL_ATTRIBUTES[TAXONOMIC_LEVELS.index(level)])
+                for level in self.levels
             )
 
         if isinstance(animal, pd.Series): # taxonomic_levels when animal is a DataFrame row
-            taxonomic_levels = (
-                animal['phylumName'],
-                animal['className'],
-                animal['orderName'],
-                animal['familyName'],
-                animal['genusName'],
-                animal['scientificName']
-            )
+            taxonomic_levels = tuple(animal[level] for level in self.levels)
 
 
         hierarchical_level = self # tmp variable to contain itself, its child, its grandchild and so on
@@ -177,6 +186,7 @@ class TaxonTree(Tree):
                 hierarchical_level.add_brench(taxon)
             hierarchical_level = hierarchical_level[Tree(taxon)]
 
+    @profiled('TaxonTree.add_animals')
     def add_animals(self, species: pd.DataFrame):
         """
         Appends multiple animals to the TaxonTree.
@@ -190,13 +200,177 @@ class TaxonTree(Tree):
         -----
         For a large DataFrame it is not recommended to 
         instantiate an Animal object every time because 
-        it takes a much longer time overall
+        it takes a much longer time overall.
+        When run as a background job (see jobs.py) it reports 
+        its progress and can be cancelled every 1000 rows
         """
-        for key, row in species.iterrows(): # iterates over the DataFrame's rows
+        for idx, (key, row) in enumerate(species.iterrows()): # iterates over the DataFrame's rows
+            if idx % 1000 == 0:
+                checkpoint(idx/len(species), f"{idx} of {len(species)} species")
             # animal = Animal(s['scientificName'])
             # self.add_animal(animal)
             self.add_animal(row) 
 
+
+SHARDS_PER_PROCESS = 4 # enough shards to keep every worker busy despite their different sizes
+
+
+def _build_subtree(taxon: str, top_level: str, species: pd.DataFrame | tuple) -> TaxonTree:
+    subtree = TaxonTree(taxon, top_level)
+    if isinstance(species, tuple): # (shared.Table, row positions): read from the mapped files
+        table, rows = species
+        species = table.take(rows, list(subtree.levels))
+    subtree.add_animals(species)
+    return subtree
+
+
+def _build_preorder(taxon: str, top_level: str, species: pd.DataFrame | tuple) -> list[tuple[int, str]]:
+    # executed by the worker processes of build_tree(): a TaxonTree is a graph of
+    # many small objects, slow to pickle, so only its pre-order visit is sent back
+    preorder = []
+    stack = [(0, _build_subtree(taxon, top_level, species))]
+    while stack:
+        depth, node = stack.pop()
+        preorder.append((depth, node.value))
+        stack.extend((depth+1, child) for child in reversed(list(node.children)))
+    return preorder
+
+
+def _balanced(nodes: list, low: int, high: int) -> BSTree.Node | None:
+    # BSTree.Node of the sorted nodes[low:high], with the median at the root
+    if low >= high:
+        return None
+    middle = (low + high)//2
+    return BSTree.Node(nodes[middle], _balanced(nodes, low, middle), _balanced(nodes, middle+1, high))
+
+
+def _rebuild(preorder: list[tuple[int, str]]) -> Tree:
+    """
+    Returns
+    -------
+    Tree
+        The tree visited by _build_preorder(). Children are listed in order, 
+        so each BSTree is rebuilt balanced, without any comparison
+    """
+    root = Tree(preorder[0][1])
+    path, children = [root], [[]] # ancestors of the current node and their children so far
+    for depth, value in preorder[1:] + [(0, None)]: # the sentinel closes every ancestor
+        while len(path) > depth: # all the children of path[-1] have been visited
+            nodes = children.pop()
+            path.pop().children.root = _balanced(nodes, 0, len(nodes))
+        if value is not None:
+            node = Tree(value, path[-1])
+            children[-1].append(node)
+            path.append(node)
+            children.append([])
+    return root
+
+
+def _merge(tree: Tree, subtree: Tree) -> None:
+    # appends subtree to tree's children; if a child equals it (case-insensitively,
+    # i.g. 'Aves' and 'AVES') their children are merged, as add_animal() would do
+    stack = [(tree, subtree)]
+    while stack:
+        parent, branch = stack.pop()
+        if not parent.add_brench(branch):
+            stack.extend((parent[branch], child) for child in branch.children)
+
+
+def _shard_level(tree: TaxonTree, species: pd.DataFrame, shards: int) -> str:
+    # the highest level which splits the species into at least shards groups
+    candidates = tree.levels[:tree.levels.index('familyName')+1]
+    for idx, level in enumerate(candidates):
+        if len(species[list(candidates[:idx+1])].drop_duplicates()) >= shards:
+            return level
+    return candidates[-1]
+
+
+@profiled('build_tree')
+def build_tree(species: pd.DataFrame, highest_taxon = 'Life', top_level = 'kingdomName',
+               shard_level: str = None, processes: int = None) -> TaxonTree:
+    """
+    Builds a TaxonTree of all the species, one shard at a time in a process pool
+
+    Parameters
+    ----------
+    species: pd.DataFrame | shared.Table
+        A DataFrame structured like 'simple_summary.csv', or the species
+        table of a SharedDataset: workers then attach to it instead of
+        receiving a pickled copy of their shard
+    highest_taxon: str
+        Value of the root
+    top_level: str
+        Taxonomic level of the root's children (by default kingdoms,
+        so that plants, fungi and animals can share a tree)
+    shard_level: str
+        The species are partitioned by the taxa from top_level down to
+        shard_level included, and each subtree rooted at a shard_level taxon
+        is built independently. By default it is the highest level giving
+        SHARDS_PER_PROCESS shards per process (at most 'familyName'):
+        e.g. classes for a dataset of chordata only
+    processes: int
+        Number of worker processes, os.cpu_count() by default.
+        With 1 every subtree is built in the current process
+
+    Returns
+    -------
+    TaxonTree
+        The same tree that add_animals() would build from top_level:
+        the subtrees are merged at the root, keeping children ordered
+
+    Raises
+    ------
+    ValueError
+        If shard_level is not a level of the tree above the species
+
+    Notes
+    -----
+    Workers send back the pre-order visit of their subtree, which is
+    rebuilt here with balanced BSTrees (much cheaper than unpickling it)
+    while the next shards are still being built.
+    As in add_animals(), BSTree methods are recursive: taxa inserted in
+    alphabetical order make a BSTree as deep as their number, so more than 
+    about sys.getrecursionlimit() sibling taxa in such order raise RecursionError
+    while their shard is built. The rebuilt trees add no further limit
+    """
+    tree = TaxonTree(highest_taxon, top_level)
+    if shard_level is not None and shard_level not in tree.levels[:-1]: # subtrees need a level below
+        raise ValueError(f"shard_level must be one of {', '.join(tree.levels[:-1])}, not '{shard_level}'")
+    processes = processes or os.cpu_count() or 1
+    # only the sharding columns are read from a shared table
+    frame = species if isinstance(species, pd.DataFrame) else species.to_frame(
+        list(tree.levels[:tree.levels.index(shard_level or 'familyName')+1]))
+    if shard_level is None:
+        shard_level = _shard_level(tree, frame, SHARDS_PER_PROCESS*processes) if processes > 1 else top_level
+    shard_levels = list(tree.levels[:tree.levels.index(shard_level)+1])
+    below = tree.levels[len(shard_levels)] # root level of each subtree's children
+    columns = list(tree.levels[len(shard_levels):])
+
+    # sort = False keeps the taxa in order of appearance, as add_animals() does
+    keys, shards = [], []
+    for key, shard in frame.groupby(shard_levels, sort = False, dropna = False):
+        keys.append(key) # a tuple of taxa, since shard_levels is a list
+        shards.append(shard[columns] if frame is species else (species, shard.index.to_numpy()))
+    roots = [key[-1] for key in keys]
+
+    if processes == 1 or len(shards) < 2:
+        subtrees = list(map(_build_subtree, roots, [below]*len(roots), shards))
+    else:
+        processes = min(processes, len(shards))
+        with ProcessPoolExecutor(processes) as pool:
+            preorders = pool.map(_build_preorder, roots, [below]*len(roots), shards,
+                                 chunksize = max(1, len(shards)//(SHARDS_PER_PROCESS*processes)))
+            subtrees = [_rebuild(preorder) for preorder in preorders]
+
+    for key, subtree in zip(keys, subtrees): # merge
+        hierarchical_level = tree
+        for taxon in key[:-1]:
+            if Tree(taxon) not in hierarchical_level.children:
+                hierarchical_level.add_brench(taxon)
+            hierarchical_level = hierarchical_level[Tree(taxon)]
+        _merge(hierarchical_level, subtree)
+    return tree
+
 # test library
 if __name__ == '__main__':
     Animal.species = pd.read_csv("simple_summary.csv")